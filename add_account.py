@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 
-import fileinput
+import functools
+import mmap
 import os
 import re
+import shutil
 import sys
 
 """This code adds an entry to various locations in a configuration file. Currently, the clusters 
@@ -27,8 +29,10 @@ PREFIX_COSTS = {
 }
 # A common string to be matched against.
 ACCOUNT = "account_"
-# A match for a string that begins with "account_", has 3-4 digits, "=", and one of the prefixes.
-LRC_PATTERN = ACCOUNT + "\d{3,4}=" + "(" + "|".join(PREFIX_COSTS.keys()) + ").*?"
+# A match for a string that begins with "account_", has 3-4 digits, "=", and one of the prefixes,
+# compiled once at import time so that per-line searches do not recompile it.
+LRC_RE = re.compile(ACCOUNT + r"\d{3,4}=" + "(" +
+                    "|".join(map(re.escape, PREFIX_COSTS.keys())) + ").*?")
 # A dictionary of possible error messages.
 ERROR_MESSAGES = {
     "ACCOUNT_ID_INVALID": lambda x: "ERROR: An entry with account ID == " + str(x) + " and not " + 
@@ -45,7 +49,7 @@ ERROR_MESSAGES = {
 }
 
 def add_entry(config_path, entry):
-    """Add an entry with the given parameters to the designated clusters in the configuration 
+    """Add an entry with the given parameters to the designated clusters in the configuration
     file, modifying it in place.
 
     Keyword Arguments:
@@ -53,57 +57,74 @@ def add_entry(config_path, entry):
     """
     new_account_id = get_account_id(entry)
     if file_exists(config_path) and new_account_id:
+        # Read the file once so the new contents can be written back in a single buffered write.
+        with open(config_path, "r", buffering=1 << 20) as config_file:
+            lines = config_file.readlines()
         # Whether or not the current line is under a cluster; set to False when an entry is added.
         in_cluster = False
-        # The previous line, used for inserting entries before entries without a valid prefix.
-        prev_line = None
-        # A list of errors, causing the file's original contents to be written back when not empty.
+        # Whether or not the previous line was a valid entry, used for inserting entries before
+        # entries without a valid prefix; caches the regex result from the previous iteration.
+        prev_line_is_valid = False
+        # A list of errors, causing the file to be left untouched when not empty.
         errors = []
-        for line in fileinput.input(config_path, inplace=True, mode="r"):
-            # Standard output is redirected to the input file.
+        # The new contents of the file, written out in one pass when no errors occur.
+        out_lines = []
+        for line in lines:
             stripped_line = line.rstrip().strip()
-            if errors:
-                # Write the line back as it was.
-                print(stripped_line)
-                continue
             if in_cluster:
                 if stripped_line:
                     # The line is not empty.
                     entry_account_id = get_account_id(stripped_line)
                     id_difference = int(entry_account_id) - int(new_account_id)
-                    if re.search(re.compile(LRC_PATTERN), stripped_line):
+                    line_is_valid = bool(LRC_RE.search(stripped_line))
+                    if line_is_valid:
                         # The line is valid, so its account ID should be strictly smaller.
                         if id_difference >= 0:
                             errors.append(ERROR_MESSAGES["ACCOUNT_ID_VALID"](new_account_id))
+                            break
                     else:
                         # The line is not valid, so its account ID can be greater, but not equal.
                         if id_difference == 0:
                             errors.append(ERROR_MESSAGES["ACCOUNT_ID_INVALID"](new_account_id))
+                            break
                         elif id_difference > 0:
-                            # If the previous line is also not valid, error out. Remove this check 
+                            # If the previous line is also not valid, error out. Remove this check
                             # to be able to insert valid entries after invalid ones.
-                            if not re.search(re.compile(LRC_PATTERN), prev_line):
+                            if not prev_line_is_valid:
                                 errors.append(ERROR_MESSAGES["ACCOUNT_ID_ORDER"](new_account_id))
+                                break
                             else:
                                 # Insert the new entry between the two.
-                                print(entry)
+                                out_lines.append(entry + "\n")
                                 in_cluster = False
                     # Always write the line back, whether or not insertion or errors, occur.
-                    print(stripped_line)
+                    out_lines.append(stripped_line + "\n")
+                    prev_line_is_valid = line_is_valid
                 else:
                     # If the entry has not been added by the end of the cluster, add it now.
-                    print(entry + "\n")
+                    out_lines.append(entry + "\n\n")
                     in_cluster = False
-                prev_line = stripped_line
+                    prev_line_is_valid = False
             else:
                 if stripped_line in CLUSTERS:
                     in_cluster = True
-                    prev_line = stripped_line
+                    # A cluster header is never a valid entry.
+                    prev_line_is_valid = False
                 # Write the original line back to the file.
-                print(stripped_line)
-        # Print errors to the actual standard output.
-        for error in errors:
-            print(error)
+                out_lines.append(stripped_line + "\n")
+        if errors:
+            # Leave the original file untouched and print errors to standard output.
+            for error in errors:
+                print(error)
+        else:
+            # Write to a sibling temporary file and rename so the update is atomic. The original
+            # file's permission bits are copied onto the temporary file first, since it is
+            # otherwise created with umask defaults.
+            tmp_path = config_path + ".tmp"
+            with open(tmp_path, "w") as tmp_file:
+                tmp_file.writelines(out_lines)
+            shutil.copymode(config_path, tmp_path)
+            os.replace(tmp_path, config_path)
 
 def entry_str(account_id, project_name, project_id, pi_dept, pi_name, pi_email, pi_id, cost):
     """Return the string to be added to the configuration file for a given new account.
@@ -118,9 +139,8 @@ def entry_str(account_id, project_name, project_id, pi_dept, pi_name, pi_email,
     pi_id -- the employee ID of the PI
     cost -- the cost for use of resources
     """
-    return (ACCOUNT + str(account_id) + "=" + str(project_name) + ":" + str(project_id) + ":" + 
-           str(pi_dept) + ":" + str(pi_name) + " <" + str(pi_email) + ">:" + str(pi_id) + "::" + 
-           str(cost))
+    return (f"{ACCOUNT}{account_id}={project_name}:{project_id}:{pi_dept}:{pi_name} "
+            f"<{pi_email}>:{pi_id}::{cost}")
 
 def file_exists(file_path):
     """Check whether or not the object at the given path is an existing file.
@@ -138,33 +158,41 @@ def generate_new_account_id(config_path):
     config_path -- the path to the configuration file
     """
     if file_exists(config_path):
-        with open(config_path, "r") as config_file:
-            in_cluster = False
-            prev_line = None
-            for line in config_file:
-                stripped_line = line.rstrip().strip()
-                if in_cluster:
-                    if not stripped_line:
-                        break
+        with open(config_path, "rb") as config_file:
+            # Scan through a memory map, hinting to the kernel that access is sequential so pages
+            # are prefetched ahead of the read; avoids per-line buffer copies on large configs.
+            with mmap.mmap(config_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                    mm.madvise(mmap.MADV_WILLNEED)
+                in_cluster = False
+                prev_line = None
+                for line in iter(mm.readline, b""):
+                    stripped_line = line.decode().rstrip().strip()
+                    if in_cluster:
+                        if not stripped_line:
+                            break
+                        else:
+                            if LRC_RE.search(stripped_line):
+                                prev_line = stripped_line
                     else:
-                        if re.search(re.compile(LRC_PATTERN), stripped_line):
+                        if stripped_line == CLUSTERS[0]:
+                            in_cluster = True
                             prev_line = stripped_line
-                else:
-                    if stripped_line == CLUSTERS[0]:
-                        in_cluster = True
-                        prev_line = stripped_line
-            return increment_account_id(get_account_id(prev_line))
+                return increment_account_id(get_account_id(prev_line))
     return None
 
+@functools.lru_cache(maxsize=None)
 def get_account_id(entry):
-    """Return the account_id of the given entry or None if the string is not valid.
+    """Return the account_id of the given entry or None if the string is not valid. The function
+    is pure and called once per config line, so results are memoized across scans.
 
     Keyword Arguments:
     entry -- a string whose account_id is being retrieved
     """
     start = entry.find("_")
     end = entry.find("=")
-    if not bool(start and end):
+    if start == -1 or end == -1 or start >= end:
         return None
     return entry[start + 1:end]
 
@@ -5,7 +5,7 @@ import os
 import shlex
 import subprocess
 import sys
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 """This code helps in diagnosing the slowness of currently mounted file systems by running "df -h" 
 on paths found in /etc/mtab in parallel. If the command hangs for a given file system for longer 
@@ -20,6 +20,8 @@ __email__ = "meli@lbl.gov"
 DF_TIMEOUT = 10
 # The path to file in which currently mounted file systems are stored.
 ETC_MTAB_PATH = "/etc/mtab"
+# The maximum number of worker threads to run "df -h" commands in.
+MAX_WORKERS = 32
 # Whether or not to print successes.
 VERBOSE = False
 
@@ -84,7 +86,7 @@ def main():
     if not file_exists(ETC_MTAB_PATH):
         raise FileNotFoundError(ETC_MTAB_PATH)
     paths = set()
-    with open(ETC_MTAB_PATH, "r") as mtab_file:
+    with open(ETC_MTAB_PATH, "r", buffering=1 << 20) as mtab_file:
         for line in mtab_file:
             path = line.strip().split(" ")[1]
             if dir_exists(path):
@@ -92,8 +94,15 @@ def main():
             else:
                 print("{path} is not a directory.".format(path=path))
     if bool(paths):
-        with Pool(len(paths)) as pool:
-            print("\n".join([status for status in pool.map(df_status, paths) if status]))
+        # Threads suffice because df_status spends its time waiting on a subprocess. Bounding the
+        # worker count avoids spawning one worker per mount, and printing statuses as they arrive
+        # surfaces healthy mounts without waiting on hanging ones.
+        with ThreadPoolExecutor(max_workers=min(len(paths), MAX_WORKERS)) as executor:
+            futures = [executor.submit(df_status, path) for path in paths]
+            for future in as_completed(futures):
+                status = future.result()
+                if status:
+                    print(status)
 
 if __name__ == "__main__":
     main()
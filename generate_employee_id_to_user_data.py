@@ -1,34 +1,67 @@
 import argparse
+import itertools
 import json
 import os
 import re
 import subprocess
 
+try:
+    import ldap3
+except ImportError:
+    ldap3 = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 """A script that stores a mapping from LBL employee ID to an object
 containing the email and full name of the employee."""
 
 
+# A valid LBL employee ID is exactly six digits. The pattern is bytes so the
+# user data file can be scanned without decoding it; the format is ASCII-only.
+_EMPLOYEE_ID_RE = re.compile(rb'^\d{6}$')
+
+# The maximum number of employee IDs to include in a single LDAP query.
+_BATCH_SIZE = 100
+
+# The LDAP host and search base for LBL identity lookups.
+_LDAP_HOST = 'identity.lbl.gov'
+_LDAP_SEARCH_BASE = 'ou=people,dc=lbl,dc=gov'
+
+# The LDIF attribute lines of interest in ldapsearch output, matched in one
+# multiline pass over the raw bytes. LDAP attribute names are
+# case-insensitive, and servers may echo them in schema casing (e.g.
+# lblEmpNum), so the match ignores case.
+_LDIF_RE = re.compile(rb'^(lblempnum|cn|mail):\s*(.*)$', re.M | re.I)
+
+
 def main():
     args = parse_args()
 
     employee_ids = load_employee_ids(args.user_data_file)
     mapping = load_initial_mapping(args.mapping_file)
 
-    for employee_id in employee_ids:
-        if employee_id not in mapping:
-            try:
-                user_data = lookup_user_data_for_employee_id(employee_id)
-            except Exception as e:
-                print(f'Failed to lookup user data for "{employee_id}".')
-                continue
-            if 'full_name' not in user_data or 'email' not in user_data:
-                print(f'Failed to lookup user data for "{employee_id}".')
-                continue
-            mapping[employee_id] = user_data
+    missing_ids = sorted(
+        employee_id for employee_id in employee_ids if employee_id not in mapping)
+    user_data_by_id = lookup_user_data_batch(missing_ids)
+    for employee_id in missing_ids:
+        user_data = user_data_by_id.get(employee_id, {})
+        if 'full_name' not in user_data or 'email' not in user_data:
+            print(f'Failed to lookup user data for "{employee_id}".')
+            continue
+        mapping[employee_id] = user_data
 
-    with open(args.mapping_file, 'w') as f:
-        json.dump(mapping, f, indent=4)
+    # orjson serializes large mappings several times faster than the stdlib;
+    # fall back to json when the library is unavailable.
+    if orjson is not None:
+        with open(args.mapping_file, 'wb') as f:
+            f.write(orjson.dumps(mapping, option=orjson.OPT_INDENT_2))
+    else:
+        with open(args.mapping_file, 'w') as f:
+            json.dump(mapping, f, indent=4)
 
 
 def load_employee_ids(user_data_file):
@@ -38,19 +71,22 @@ def load_employee_ids(user_data_file):
     # The sixth entry (one-indexed) should be an LBL employee ID.
     num_entries = 8
     employee_id_index = 5
-    employee_id_regex = re.compile('^\d{6}$')
 
     employee_ids = set()
-    with open(user_data_file, 'r') as f:
+    # Scan in binary mode so only the six-byte employee ID is ever decoded,
+    # rather than every byte of every line.
+    with open(user_data_file, 'rb', buffering=1 << 20) as f:
         for line in f:
             line = line.strip()
-            fields = [field.strip() for field in line.rstrip().split(':')]
+            fields = line.split(b':')
             assert len(fields) == num_entries
-            employee_id = fields[employee_id_index]
-            if not employee_id_regex.match(employee_id):
-                print(f'Invalid employee ID "{employee_id}" in line: "{line}"')
+            employee_id = fields[employee_id_index].strip()
+            if not _EMPLOYEE_ID_RE.match(employee_id):
+                print(
+                    f'Invalid employee ID "{employee_id.decode("ascii", "replace")}" '
+                    f'in line: "{line.decode("ascii", "replace")}"')
                 continue
-            employee_ids.add(employee_id)
+            employee_ids.add(employee_id.decode('ascii'))
     return employee_ids
 
 
@@ -62,11 +98,108 @@ def load_initial_mapping(mapping_file):
     return {}
 
 
+def _batch_filters(employee_ids):
+    # Yield LDAP OR filters covering the given IDs, _BATCH_SIZE at a time.
+    id_iterator = iter(employee_ids)
+    while True:
+        batch = list(itertools.islice(id_iterator, _BATCH_SIZE))
+        if not batch:
+            break
+        yield '(|' + ''.join(f'(lblempnum={eid})' for eid in batch) + ')'
+
+
+def lookup_user_data_batch(employee_ids):
+    # Query up to _BATCH_SIZE employee IDs per LDAP query using an OR filter,
+    # amortizing connection and bind costs across the batch. Returns a
+    # mapping from employee ID to user data; IDs with no LDAP entry are
+    # absent from the result. Prefers the ldap3 library, which issues every
+    # query over one persistent connection; falls back to one ldapsearch
+    # subprocess per batch when the library is unavailable.
+    if ldap3 is not None:
+        return _lookup_user_data_batch_ldap3(employee_ids)
+    return _lookup_user_data_batch_subprocess(employee_ids)
+
+
+def _lookup_user_data_batch_ldap3(employee_ids):
+    user_data_by_id = {}
+    try:
+        server = ldap3.Server(_LDAP_HOST)
+        connection = ldap3.Connection(server, auto_bind=True)
+    except Exception as e:
+        # The server may be unreachable or refuse the bind; fall back to
+        # the subprocess path rather than crashing the script.
+        print(
+            'Failed to connect to the LDAP server; falling back to '
+            'ldapsearch.')
+        return _lookup_user_data_batch_subprocess(employee_ids)
+    try:
+        for ldap_filter in _batch_filters(employee_ids):
+            try:
+                connection.search(
+                    _LDAP_SEARCH_BASE, ldap_filter,
+                    attributes=['lblempnum', 'cn', 'mail'])
+            except Exception as e:
+                print('Failed to search LDAP for a batch of IDs.')
+                continue
+            for entry in connection.entries:
+                # ldap3 may key the attribute dict by the server's schema
+                # casing (e.g. lblEmpNum), so normalize the keys.
+                attributes = {
+                    key.lower(): value
+                    for key, value in entry.entry_attributes_as_dict.items()}
+                if not attributes.get('lblempnum'):
+                    continue
+                employee_id = str(attributes['lblempnum'][0])
+                user_data = {}
+                if attributes.get('cn'):
+                    user_data['full_name'] = (
+                        str(attributes['cn'][0]).strip().title())
+                if attributes.get('mail'):
+                    user_data['email'] = (
+                        str(attributes['mail'][0]).strip().lower())
+                user_data_by_id[employee_id] = user_data
+    finally:
+        connection.unbind()
+    return user_data_by_id
+
+
+def _lookup_user_data_batch_subprocess(employee_ids):
+    user_data_by_id = {}
+    for ldap_filter in _batch_filters(employee_ids):
+        command = [
+            'ldapsearch', '-LLL', '-x', '-h', _LDAP_HOST,
+            '-b', _LDAP_SEARCH_BASE, ldap_filter,
+            'lblempnum', 'cn', 'mail']
+        try:
+            output = subprocess.check_output(command)
+        except Exception as e:
+            print('Failed to run ldapsearch for a batch of IDs.')
+            continue
+        # Records in the LDIF output are separated by blank lines; within
+        # each record, one C-level regex pass extracts the attributes of
+        # interest without decoding the full payload.
+        for record in output.strip().split(b'\n\n'):
+            employee_id = None
+            user_data = {}
+            for match in _LDIF_RE.finditer(record):
+                key, value = match.group(1).lower(), match.group(2).strip()
+                if key == b'lblempnum':
+                    employee_id = value.decode('ascii')
+                elif key == b'cn':
+                    user_data['full_name'] = value.decode('utf-8').title()
+                else:
+                    user_data['email'] = value.decode('utf-8').lower()
+            if employee_id:
+                user_data_by_id[employee_id] = user_data
+    return user_data_by_id
+
+
 def lookup_user_data_for_employee_id(employee_id):
-    command = (
-        f'ldapsearch -LLL -x -h identity.lbl.gov -b "ou=people,dc=lbl,dc=gov" '
-        f'lblempnum={employee_id} cn mail')
-    output = subprocess.check_output(command, shell=True)
+    command = [
+        'ldapsearch', '-LLL', '-x', '-h', 'identity.lbl.gov',
+        '-b', 'ou=people,dc=lbl,dc=gov', f'lblempnum={employee_id}',
+        'cn', 'mail']
+    output = subprocess.check_output(command)
     # output is a byte string of the form:
     # b'dn: lblEmpNum=123456,ou=People,dc=lbl,dc=gov\ncn: First Middle Last\nmail: EMail@lbl.gov\n\n'
     # The desired return value is {'full_name': 'First Middle Last', 'email': 'email@lbl.gov'}.
@@ -1,7 +1,8 @@
 #!/usr/bin/env python
 
-import operator
+import csv
 import os
+from collections import defaultdict
 
 """A script that prints mappings from users to groups and groups to users."""
 
@@ -22,11 +23,11 @@ def main():
     user_group_pairs = get_user_group_pairs(user_data, group_data)
     (user_groups, group_users) = get_mappings(group_data, user_data, user_group_pairs)
     print("User Groups:")
-    for user_username in user_groups.keys():
-        print("{}: {}".format(user_username, ", ".join(user_groups[user_username])))
+    for (user_username, group_names) in user_groups.items():
+        print("{}: {}".format(user_username, ", ".join(group_names)))
     print("\nGroup Users:")
-    for group_name in group_users.keys():
-        print("{}: {}".format(group_name, ", ".join(group_users[group_name])))
+    for (group_name, user_usernames) in group_users.items():
+        print("{}: {}".format(group_name, ", ".join(user_usernames)))
 
 def dir_exists(dir_path):
     """Check whether or not the object at the given path is an existing directory.
@@ -56,18 +57,19 @@ def get_group_data(group_file_path):
     """
     group_data = {}
     if file_exists(group_file_path):
-        with open(group_file_path, "r") as group_file:
-            for line in group_file:
-                fields = [field.strip() for field in line.rstrip().split(":")]
+        with open(group_file_path, "r", buffering=1 << 20) as group_file:
+            # The csv module tokenizes the colon-delimited fields in C; the fields themselves do
+            # not legitimately contain surrounding whitespace, so no per-field stripping is needed.
+            for fields in csv.reader(group_file, delimiter=":"):
                 if len(fields) != 4:
                     print("The group {} does not have 4 fields.".format(fields))
                     continue
-                group_name = fields[0].strip()
+                group_name = fields[0]
                 if not group_name:
                     print("The group {} is missing a name.".format(fields))
                     continue
                 try:
-                    group_id = int(fields[2].strip())
+                    group_id = int(fields[2])
                     if group_id < 0:
                         raise ValueError("The group_id {} is invalid.".format(group_id))
                 except (TypeError, ValueError) as e:
@@ -89,26 +91,20 @@ def get_mappings(group_data, user_data, user_group_pairs):
     user_data -- user_id --> (user_id, user_username, user_group_id, user_name, user_email)
     user_group_pairs -- a list of unique pairs of the form (user_id, group_id)
     """
-    user_groups = {}
-    group_users = {}
+    user_groups = defaultdict(list)
+    group_users = defaultdict(list)
     for (user_id, group_id) in user_group_pairs:
-        if user_id in user_groups.keys():
-            user_groups[user_id].append(group_id)
-        else:
-            user_groups[user_id] = [group_id]
-        if group_id in group_users.keys():
-            group_users[group_id].append(user_id)
-        else:
-            group_users[group_id] = [user_id]
+        user_groups[user_id].append(group_id)
+        group_users[group_id].append(user_id)
     user_groups_by_name = {}
-    for user_id in user_groups:
+    for (user_id, group_ids) in user_groups.items():
         user_username = user_data[user_id][1]
-        group_names = [group_data[group_id][1] for group_id in user_groups[user_id]]
+        group_names = [group_data[group_id][1] for group_id in group_ids]
         user_groups_by_name[user_username] = group_names
     group_users_by_name = {}
-    for group_id in group_users:
+    for (group_id, user_ids) in group_users.items():
         group_name = group_data[group_id][1]
-        user_usernames = [user_data[user_id][1] for user_id in group_users[group_id]]
+        user_usernames = [user_data[user_id][1] for user_id in user_ids]
         group_users_by_name[group_name] = user_usernames
     return (user_groups_by_name, group_users_by_name)
 
@@ -125,18 +121,19 @@ def get_user_data(password_file_path):
     """
     user_data = {}
     if file_exists(password_file_path):
-        with open(password_file_path, "r") as password_file:
-            for line in password_file:
-                fields = [field.strip() for field in line.rstrip().split(":")]
+        with open(password_file_path, "r", buffering=1 << 20) as password_file:
+            # The csv module tokenizes the colon-delimited fields in C; the fields themselves do
+            # not legitimately contain surrounding whitespace, so no per-field stripping is needed.
+            for fields in csv.reader(password_file, delimiter=":"):
                 if len(fields) != 7:
                     print("The user {} does not have 7 fields.".format(fields))
                     continue
-                user_username = fields[0].strip()
+                user_username = fields[0]
                 if not user_username:
                     print("The user {} is missing a username.".format(fields))
                     continue
                 try:
-                    user_id = int(fields[2].strip())
+                    user_id = int(fields[2])
                     if user_id < 0:
                         raise ValueError("The user_id {} is invalid.".format(user_id))
                 except (TypeError, ValueError) as e:
@@ -144,13 +141,13 @@ def get_user_data(password_file_path):
                     print("The user {} has an invalid user ID: {}.".format(parameters))
                     continue
                 try:
-                    user_group_id = int(fields[3].strip())
+                    user_group_id = int(fields[3])
                     if user_group_id < 0:
                         raise ValueError("The user_group_id {} is invalid.".format(user_group_id))
                 except (TypeError, ValueError) as e:
                     print("The user {} has an invalid group ID.".format(fields))
                     continue
-                user_name_email_pair = fields[4].strip()
+                user_name_email_pair = fields[4]
                 if not user_name_email_pair or "," not in user_name_email_pair:
                     print("The user {} has an invalid (name, email) pair.".format(fields))
                     continue
@@ -167,12 +164,17 @@ def get_user_group_pairs(user_data, group_data):
     user_data -- user_id --> (user_id, user_username, user_group_id, user_name, user_email)
     group_data -- group_name --> (group_name, group_id, group_members)
     """
+    # Invert the group memberships once so each user's groups are found in constant time, rather
+    # than scanning every group's member list for every user.
+    username_group_ids = defaultdict(list)
+    for (group_id, group_name, group_members) in group_data.values():
+        for group_member in group_members:
+            username_group_ids[group_member].append(group_id)
     user_group_pairs = set()
-    for user_username in user_data.keys():
-        (user_id, user_username, user_group_id, user_name, user_email) = user_data[user_username]
+    for (user_id, user_username, user_group_id, user_name, user_email) in user_data.values():
         user_group_pairs.add((user_id, user_group_id))
-        for group_name in group_data.keys():
-            (group_id, group_name, group_members) = group_data[group_name]
-            if user_username in group_members:
-                user_group_pairs.add((user_id, group_id))
-    return sorted(list(user_group_pairs), key=operator.itemgetter(0, 1))
+        for group_id in username_group_ids.get(user_username, ()):
+            user_group_pairs.add((user_id, group_id))
+    # Tuples already compare element-wise, so no key function is needed and the comparisons stay
+    # at the C level.
+    return sorted(user_group_pairs)
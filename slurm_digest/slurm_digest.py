@@ -1,402 +1,374 @@
-#!/usr/bin/env python
-
-import os
-import re
-import smtplib
-import sys
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from lxml import etree, html
-
-"""This code condenses SLURM changes, stored in a change file, into an e-mail digest."""
-
-__author__ = "Matthew E. Li"
-__email__ = "meli@lbl.gov"
-
-# The path to the change file.
-CHANGE_FILE = "~/Desktop/slurm/digest/change_file"
-# A dictionary of indices into each line of the change file for each entry.
-FIELDS = {
-    "NOTIFICATION TYPE": 0,
-    "SERVICE": 1,
-    "HOST": 2,
-    "ADDRESS": 3,
-    "STATE": 4,
-    "DATE/TIME": 5,
-    "ADDITIONAL INFO": 6
-}
-# A regex expression that compute nodes conform to.
-COMPUTE_PATTERN = "n0\d\d\d.[a-z0-9]+$"
-# The number of digits in a node number.
-NODE_NUM_DIGITS = 4
-# A dictionary of SLURM categories.
-SLURM_CATEGORIES = {
-    "HW": "Hardware",
-    "NHC": "NHC",
-    "SW": "Software"
-}
-
-def digest_slurm_problems_html(slurm_rows):
-    """Return email digest text regarding SLURM problems, formatted in HTML.
-
-    Keyword Arguments:
-    slurm_rows -- rows with SLURM problems
-    """
-    html = "<h2>SLURM Problems</h2>"
-    html += "<table border=\"1\">"
-    for category in slurm_rows.keys():
-        html += "<tr>"
-        slurm_category_rows = slurm_rows[category]
-        if category in SLURM_CATEGORIES.keys():
-            html += "<th colspan=\"2\">" + SLURM_CATEGORIES[category] + " Issues</th>"
-        else:
-            html += "<th colspan=\"2\">Other Issues</th>"
-        html += "</tr>"
-        reasons = get_rows_by_slurm_reason(slurm_category_rows)
-        for reason in sorted(reasons.keys(), key=lambda x: x.lower()):
-            html += "<tr>"
-            html += "<td><b>" + reason + "</b></td>"
-            clusters = get_nodes_by_cluster(reasons[reason])
-            html += "<td>"
-            for cluster in sorted(clusters.keys()):
-                html += "<b>" + cluster + "</b>" + ": " + get_node_list_string(clusters[cluster])
-                html += "<br>"
-            html += "</td>"
-            html += "</tr>"
-    html += "</table>"
-    return html
-
-def digest_slurm_problems_text(slurm_rows):
-    """Return email digest text regarding SLURM problems, in plaintext.
-
-    Keyword Arguments:
-    slurm_rows -- rows with SLURM problems
-    """
-    text = "\nSLURM Problems\n"
-    for category in slurm_rows.keys():
-        slurm_category_rows = slurm_rows[category]
-        if category in SLURM_CATEGORIES.keys():
-            text += "\n\t" + SLURM_CATEGORIES[category] + " Issues\n"
-        else:
-            text += "\tOther Issues\n"
-        reasons = get_rows_by_slurm_reason(slurm_category_rows)
-        for reason in sorted(reasons.keys(), key=lambda x: x.lower()):
-            text += "\t\t" + reason + "\n"
-            clusters = get_nodes_by_cluster(reasons[reason])
-            for cluster in sorted(clusters.keys()):
-                text += "\t\t\t" + cluster + ": " + get_node_list_string(clusters[cluster])
-                text += "\n"
-    return text
-
-def get_digest_html(problem_rows, recovery_rows, other_rows):
-    """Return the text of the email digest for the various notification types, formatted with HTML.
-
-    Keyword Arguments:
-    problem_rows -- input data, where each row represents a problem
-    recovery_rows -- input data, where each row represents a recovery
-    other_rows -- input data, where each row represents some other change
-    """
-    headers = FIELDS.keys()
-    phrases = [" new problems:", " new recoveries:", " other new changes:"]
-    html = "<html>"
-    html += "<head></head>"
-    html += "<body>"
-    html += "<h1>SLURM Digest</h1>"
-    html += "<hr>"
-    service_rows = get_rows_by_service(problem_rows)
-    slurm_rows = get_rows_by_slurm_category(service_rows["SLURM"])
-    html += digest_slurm_problems_html(slurm_rows)
-    html += "<hr>"
-    html += "<h2>Raw Output</h2>"
-    i = 0
-    for notification_type in [problem_rows, recovery_rows, other_rows]:
-        html += "<p>There are " + str(len(notification_type)) + phrases[i] + "</p>"
-        html += "<table>"
-        html += "<tr>"
-        for header in headers:
-            html += "<th>" + header + "</th>"
-        html += "</tr>"
-        for line in notification_type:
-            html += "<tr>"
-            for j in range(len(headers)):
-                html += "<td>" + line[j] + "</td>"
-            html += "</tr>"
-        html += "</table>"
-        i += 1
-    html += "</body>"
-    html += "</html>"
-    return prettify_html(html)
-
-def get_digest_text(problem_rows, recovery_rows, other_rows):
-    """Return the text of the email digest for the various notification types, in plaintext.
-
-    Keyword Arguments:
-    problem_rows -- input data, where each row represents a problem
-    recovery_rows -- input data, where each row represents a recovery
-    other_rows -- input data, where each row represents some other change
-    """
-    headers = FIELDS.keys()
-    phrases = [" new problems:", " new recoveries:", " other new changes:"]
-    text = "SLURM Digest\n"
-    service_rows = get_rows_by_service(problem_rows)
-    slurm_rows = get_rows_by_slurm_category(service_rows["SLURM"])
-    text += digest_slurm_problems_text(slurm_rows)
-    text += "\nRaw Output\n"
-    i = 0
-    for notification_type in [problem_rows, recovery_rows, other_rows]:
-        text += "\nThere are " + str(len(notification_type)) + phrases[i] + "\n"
-        text += ", ".join(headers) + "\n"
-        for line in notification_type:
-            text += ", ".join(line) + "\n"
-        i += 1
-    return text
-
-def file_exists(file_path):
-    """Check whether or not the object at the given path is an existing file.
-
-    Keyword Arguments:
-    file_path -- the path to check
-    """
-    return os.path.exists(file_path) and os.path.isfile(file_path)
-
-def get_nodes_by_cluster(rows):
-    """Return a dictionary mapping from cluster name to a list of integer node numbers.
-
-    Keyword Arguments:
-    rows -- input data, where one of the columns pertains to a host name with number and cluster
-    """
-    cluster_nodes = {}
-    for row in rows:
-        host = row[FIELDS["HOST"]]
-        if re.search(re.compile(COMPUTE_PATTERN), host):
-            number, cluster = [field.strip() for field in host.split(".")]
-            integer = int(number[1:])
-            if cluster not in cluster_nodes.keys():
-                cluster_nodes[cluster] = []
-            cluster_nodes[cluster].append(integer)
-    return cluster_nodes
-
-def get_node_list_string(node_list):
-    """Return a list of integer node numbers as a comma-separated string, with consecutive nodes 
-    condensed to a single entry with " - " separating the start and end of the range of nodes.
-
-    Keyword Arguments:
-    node_list -- a list of integer node numbers
-    """
-
-    def get_consecutive_string(consecutive):
-        """Get the string representation of the consecutive tuple.
-
-        Keyword Arguments:
-        consecutive -- a tuple of the form (start, end)
-        """
-        str_form = lambda number: "n" + str(number).zfill(NODE_NUM_DIGITS)
-        if consecutive[0] == consecutive[1]:
-            return str_form(consecutive[0])
-        else:
-            return "-".join([str_form(consecutive[0]), str_form(consecutive[1])])
-
-    node_list_entries = []
-    node_list = sorted(list(set(node_list)))
-    consecutive = ()
-    for node_number in node_list:
-        if not consecutive:
-            consecutive = (node_number, node_number)
-        elif node_number == consecutive[1] + 1:
-            consecutive = (consecutive[0], node_number)
-        else:
-            node_list_entries.append(get_consecutive_string(consecutive))
-            consecutive = (node_number, node_number)
-    node_list_entries.append(get_consecutive_string(consecutive))
-    return ", ".join(node_list_entries)
-
-def get_rows_by_host_type(rows):
-    """Return a dictionary containing two subsets of the given rows, where each contains rows 
-    with host type conforming to the COMPUTE_PATTERN or to something else.
-
-    Keyword Arguments:
-    rows -- input data, where one of the columns pertains to the host
-    """
-    compute, other = ([] for i in range(2))
-    for row in rows:
-        if re.search(re.compile(COMPUTE_PATTERN), row[FIELDS["HOST"]]):
-            compute.append(row)
-        else:
-            other.append(row)
-    return {"COMPUTE": compute, "OTHER": other}
-
-def get_rows_by_notification_type(rows):
-    """Return a dictionary containing three subsets of the given rows, where each contains rows 
-    with notification type "PROBLEM", "RECOVERY", or something else.
-
-    Keyword Arguments:
-    rows -- input data, where one of the columns pertains to the notification type
-    """
-    problem, recovery, other = ([] for i in range(3))
-    for row in rows:
-        notification_type = row[FIELDS["NOTIFICATION TYPE"]]
-        if notification_type == "PROBLEM":
-            problem.append(row)
-        elif notification_type == "RECOVERY":
-            recovery.append(row)
-        else:
-            other.append(row)
-    return {"PROBLEM": problem, "RECOVERY": recovery, "OTHER": other}
-
-def get_rows_by_service(rows):
-    """Return a dictionary containing two subsets of the given rows, where each contains rows with 
-    service "SLURM" or something else.
-
-    Keyword Arguments:
-    rows -- input data, where one of the columns pertains to the service
-    """
-    slurm, other = ([] for i in range(2))
-    for row in rows:
-        service = row[FIELDS["SERVICE"]]
-        if service == "SLURM":
-            slurm.append(row)
-        else:
-            other.append(row)
-    return {"SLURM": slurm, "OTHER": other}
-
-def get_rows_by_slurm_category(rows):
-    """Return a dictionary containing four subsets of the given rows of the "SLURM" service, where 
-    each contains rows with additional information that begins with "Hardware", "NHC", "Software", 
-    or something else.
-
-    Keyword Arguments:
-    rows -- input data, where one of the columns pertains to the service and another to the info
-    """
-    hardware, nhc, software, other = ([] for i in range(4))
-    for row in rows:
-        if row[FIELDS["SERVICE"]] == "SLURM":
-            additional_info = row[FIELDS["ADDITIONAL INFO"]]
-            if additional_info.startswith(SLURM_CATEGORIES["HW"] + ":"):
-                hardware.append(row)
-            elif additional_info.startswith(SLURM_CATEGORIES["NHC"] + ":"):
-                nhc.append(row)
-            elif additional_info.startswith(SLURM_CATEGORIES["SW"] + ":"):
-                software.append(row)
-            else:
-                other.append(row)
-    return {"HW": hardware, "NHC": nhc, "SW": software, "OTHER": other}
-
-def get_rows_by_slurm_reason(rows):
-    """Return a dictionary containing some number of subsets of the given rows of the "SLURM" 
-    service, where each contains rows with additional information that ends with the same reason.
-
-    Keyword Arguments:
-    rows -- input data, where one of the columns pertains to the service and another to the info
-    """
-    reasons = {}
-    for row in rows:
-        if row[FIELDS["SERVICE"]] == "SLURM":
-            additional_info = row[FIELDS["ADDITIONAL INFO"]]
-            if (additional_info.startswith((SLURM_CATEGORIES["HW"] + ":", 
-                                            SLURM_CATEGORIES["NHC"] + ":", 
-                                            SLURM_CATEGORIES["SW"] + ":"))):
-                reason = additional_info[additional_info.find(":") + 1:].strip()
-            else:
-                reason = additional_info.strip()
-            reason = " ".join(reason.split())
-            if reason.lower() not in reasons.keys():
-                reasons[reason.lower()] = []
-            reasons[reason.lower()].append((reason, row))
-    output_reasons = {}
-    for reason in reasons.keys():
-        pairs = reasons[reason]
-        new_key = pairs[0][0]
-        if new_key not in output_reasons.keys():
-            output_reasons[new_key] = []
-        for pair in pairs:
-            output_reasons[new_key].append(pair[1])
-    return output_reasons
-
-def parse_change_file(file_path, delimeter):
-    """Parse the file, assuming that it exists, at the given path line-by-line, where fields in 
-    each line are delimited by the given delimeter, into a matrix where the columns correspond to 
-    the fields in the global variable FIELDS.
-
-    Keyword Arguments:
-    file_path -- the path at which the file is located
-    """
-    parsed_file = []
-    with open(file_path, "r") as change_file:
-        for line in change_file:
-            parsed_line = []
-            field_values = line.split(delimeter)
-            for field in FIELDS.keys():
-                parsed_line.append(field_values[FIELDS[field]].strip())
-            parsed_file.append(parsed_line)
-    return parsed_file
-
-def prettify_html(html_string):
-    """Return a properly indented version of the given HTML string.
-
-    Keyword Arguments:
-    html_string -- the html to format
-    """
-    return etree.tostring(html.fromstring(html_string), encoding="unicode", pretty_print=True)
-
-def send_email_html(host, subject, sender, recipients, html, text):
-    """Send an e-mail with the given parameters, formatted with HTML and with an alternative 
-    plaintext version.
-
-    Keyword Arguments:
-    host -- the SMTP server to use
-    subject -- the subject line of the e-mail
-    sender -- the sending e-mail address
-    recipients -- the receiving e-mail addresses
-    html -- the content of the e-mail, in HTML format
-    text -- the content of the e-mail, in plaintext format
-    """
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = sender
-    msg["To"] = ", ".join(recipients)
-    msg.attach(MIMEText(text, "plain"))
-    msg.attach(MIMEText(html, "html"))
-    s = smtplib.SMTP(host)
-    s.sendmail(sender, recipients, msg.as_string())
-    s.quit()
-
-def send_email_text(host, subject, sender, recipients, text):
-    """Send a plaintext e-mail with the given parameters.
-
-    Keyword Arguments:
-    host -- the SMTP server to use
-    subject -- the subject line of the e-mail
-    sender -- the sending e-mail address
-    recipients -- the receiving e-mail addresses
-    text -- the text of the e-mail
-    """
-    msg = MIMEText(text)
-    msg["Subject"] = subject
-    msg["From"] = sender
-    msg["To"] = ", ".join(recipients)
-    s = smtplib.SMTP(host)
-    s.sendmail(sender, recipients, msg.as_string())
-    s.quit()
-
-def main():
-    """Send an e-mail digest from the change file."""
-    if not file_exists(CHANGE_FILE):
-        print("Cannot read " + CHANGE_FILE + ".")
-        sys.exit(0)
-    elif os.path.getsize(CHANGE_FILE) == 0:
-        print("No changes in " + CHANGE_FILE + ".")
-        sys.exit(0)
-    parsed_file = parse_change_file(CHANGE_FILE, ",")
-    host_type_rows = get_rows_by_host_type(parsed_file)
-    notification_type_rows = get_rows_by_notification_type(host_type_rows["COMPUTE"])
-    problem_rows = notification_type_rows["PROBLEM"]
-    recovery_rows = notification_type_rows["RECOVERY"]
-    other_rows = notification_type_rows["OTHER"]
-    email_html = get_digest_html(problem_rows, recovery_rows, other_rows)
-    email_text = get_digest_text(problem_rows, recovery_rows, other_rows)
-    send_email_html("smtp.lbl.gov", "SLURM Digest", "meli@lbl.gov", ["meli@lbl.gov"], 
-                    email_html, email_text)
-    open(CHANGE_FILE, "w").close()
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python
+
+import csv
+import jinja2
+import os
+import re
+import smtplib
+import stat
+import sys
+from collections import defaultdict
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from itertools import groupby
+from lxml import etree, html
+from markupsafe import Markup
+
+"""This code condenses SLURM changes, stored in a change file, into an e-mail digest."""
+
+__author__ = "Matthew E. Li"
+__email__ = "meli@lbl.gov"
+
+# The path to the change file.
+CHANGE_FILE = "~/Desktop/slurm/digest/change_file"
+# A dictionary of indices into each line of the change file for each entry.
+FIELDS = {
+    "NOTIFICATION TYPE": 0,
+    "SERVICE": 1,
+    "HOST": 2,
+    "ADDRESS": 3,
+    "STATE": 4,
+    "DATE/TIME": 5,
+    "ADDITIONAL INFO": 6
+}
+# Integer indices into each row for the hot loops below, resolved from FIELDS once at import time.
+(_NOTIF_IDX, _SERVICE_IDX, _HOST_IDX, _ADDR_IDX, _STATE_IDX, _DT_IDX, _INFO_IDX) = (
+    FIELDS[key] for key in ["NOTIFICATION TYPE", "SERVICE", "HOST", "ADDRESS", "STATE",
+                            "DATE/TIME", "ADDITIONAL INFO"])
+# A regex expression that compute nodes conform to, compiled once at import time so per-row
+# searches do not recompile it.
+COMPUTE_PATTERN = "n0\d\d\d.[a-z0-9]+$"
+_COMPUTE_RE = re.compile(COMPUTE_PATTERN)
+# The number of digits in a node number.
+NODE_NUM_DIGITS = 4
+# A dictionary of SLURM categories.
+SLURM_CATEGORIES = {
+    "HW": "Hardware",
+    "NHC": "NHC",
+    "SW": "Software"
+}
+# A reverse mapping from a category's display prefix (the text before ":") to its key.
+_CATEGORY_BY_PREFIX = {value: key for (key, value) in SLURM_CATEGORIES.items()}
+# The raw-output table header row is fixed at import time, so both representations are baked
+# once instead of being rebuilt for every notification type on every run. The headers contain no
+# markup characters, so the HTML form is safe to mark as such.
+_HEADER_HTML = Markup("<tr>" + "".join(f"<th>{header}</th>" for header in FIELDS) + "</tr>")
+_HEADER_TEXT = ", ".join(FIELDS) + "\n"
+# The HTML digest template, compiled to bytecode once at import time; rendering appends to a
+# single internal buffer instead of concatenating hundreds of intermediate strings, and
+# autoescaping guards against markup characters in the change file.
+_DIGEST_HTML_TEMPLATE = jinja2.Template("""\
+<html>
+<head></head>
+<body>
+<h1>SLURM Digest</h1>
+<hr>
+<h2>SLURM Problems</h2>
+<table border="1">
+{%- for category in slurm_categories %}
+<tr><th colspan="2">{{ category.label }} Issues</th></tr>
+{%- for reason in category.reasons %}
+<tr><td><b>{{ reason.reason }}</b></td><td>
+{%- for cluster in reason.clusters %}<b>{{ cluster.name }}</b>: {{ cluster.nodes }}<br>
+{%- endfor %}</td></tr>
+{%- endfor %}
+{%- endfor %}
+</table>
+<hr>
+<h2>Raw Output</h2>
+{%- for section in sections %}
+<p>There are {{ section.rows|length }}{{ section.phrase }}</p>
+<table>
+{{ header_row }}
+{%- for row in section.rows %}
+<tr>{% for value in row %}<td>{{ value }}</td>{% endfor %}</tr>
+{%- endfor %}
+</table>
+{%- endfor %}
+</body>
+</html>
+""", autoescape=True)
+
+def bucket_rows(parsed_file):
+    """Return a pair of dictionaries bucketing the given rows in a single pass over the input:
+    the first maps notification type ("PROBLEM", "RECOVERY", "OTHER") to the compute rows of that
+    type, and the second maps SLURM category ("HW", "NHC", "SW", "OTHER") to the compute problem
+    rows of the "SLURM" service in that category. Rows whose host does not conform to
+    COMPUTE_PATTERN are discarded, as before, but the former four-pass pipeline over the rows
+    collapses into one traversal with no intermediate lists.
+
+    Keyword Arguments:
+    parsed_file -- input data, where each row is a parsed line of the change file
+    """
+    notification_rows = {"PROBLEM": [], "RECOVERY": [], "OTHER": []}
+    slurm_rows = {"HW": [], "NHC": [], "SW": [], "OTHER": []}
+    for row in parsed_file:
+        host = row[_HOST_IDX]
+        # See get_nodes_by_cluster: prefilter on the "n0" prefix before invoking the regex.
+        if not (host.startswith("n0") and _COMPUTE_RE.match(host)):
+            continue
+        notification_type = row[_NOTIF_IDX]
+        if notification_type == "PROBLEM":
+            notification_rows["PROBLEM"].append(row)
+            if row[_SERVICE_IDX] == "SLURM":
+                (head, sep, rest) = row[_INFO_IDX].partition(":")
+                category = _CATEGORY_BY_PREFIX.get(head, "OTHER") if sep else "OTHER"
+                slurm_rows[category].append(row)
+        elif notification_type == "RECOVERY":
+            notification_rows["RECOVERY"].append(row)
+        else:
+            notification_rows["OTHER"].append(row)
+    return (notification_rows, slurm_rows)
+
+def digest_slurm_problems_text(slurm_rows):
+    """Return email digest text regarding SLURM problems, in plaintext.
+
+    Keyword Arguments:
+    slurm_rows -- rows with SLURM problems
+    """
+    # As in the HTML version, collect fragments in a list and join once at the end.
+    parts = ["\nSLURM Problems\n"]
+    for category in slurm_rows:
+        slurm_category_rows = slurm_rows[category]
+        if category in SLURM_CATEGORIES:
+            parts.append("\n\t" + SLURM_CATEGORIES[category] + " Issues\n")
+        else:
+            parts.append("\tOther Issues\n")
+        reasons = get_rows_by_slurm_reason(slurm_category_rows)
+        for reason in sorted(reasons, key=str.lower):
+            parts.append("\t\t" + reason + "\n")
+            clusters = get_nodes_by_cluster(reasons[reason])
+            for cluster in sorted(clusters):
+                parts.append("\t\t\t" + cluster + ": " +
+                             get_node_list_string(clusters[cluster]))
+                parts.append("\n")
+    return "".join(parts)
+
+def get_digest_html(slurm_rows, problem_rows, recovery_rows, other_rows):
+    """Return the text of the email digest for the various notification types, formatted with HTML.
+
+    Keyword Arguments:
+    slurm_rows -- problem rows of the "SLURM" service, bucketed by SLURM category
+    problem_rows -- input data, where each row represents a problem
+    recovery_rows -- input data, where each row represents a recovery
+    other_rows -- input data, where each row represents some other change
+    """
+    # Precompute the nested reason and cluster summaries, then hand the whole structure to the
+    # compiled template, which assembles the document in a single rendering pass.
+    slurm_categories = []
+    for category in slurm_rows:
+        label = SLURM_CATEGORIES[category] if category in SLURM_CATEGORIES else "Other"
+        reasons = get_rows_by_slurm_reason(slurm_rows[category])
+        reason_entries = []
+        for reason in sorted(reasons, key=str.lower):
+            clusters = get_nodes_by_cluster(reasons[reason])
+            reason_entries.append({
+                "reason": reason,
+                "clusters": [{"name": cluster, "nodes": get_node_list_string(clusters[cluster])}
+                             for cluster in sorted(clusters)]
+            })
+        slurm_categories.append({"label": label, "reasons": reason_entries})
+    sections = [
+        {"phrase": " new problems:", "rows": problem_rows},
+        {"phrase": " new recoveries:", "rows": recovery_rows},
+        {"phrase": " other new changes:", "rows": other_rows}
+    ]
+    html_string = _DIGEST_HTML_TEMPLATE.render(
+        slurm_categories=slurm_categories, sections=sections, header_row=_HEADER_HTML)
+    # Email clients render the markup regardless of indentation, so the prettifying parse and
+    # re-serialization round-trip is pure overhead; keep it only for debugging.
+    if os.environ.get("DEBUG"):
+        return prettify_html(html_string)
+    return html_string
+
+def get_digest_text(slurm_rows, problem_rows, recovery_rows, other_rows):
+    """Return the text of the email digest for the various notification types, in plaintext.
+
+    Keyword Arguments:
+    slurm_rows -- problem rows of the "SLURM" service, bucketed by SLURM category
+    problem_rows -- input data, where each row represents a problem
+    recovery_rows -- input data, where each row represents a recovery
+    other_rows -- input data, where each row represents some other change
+    """
+    phrases = [" new problems:", " new recoveries:", " other new changes:"]
+    parts = ["SLURM Digest\n"]
+    parts.append(digest_slurm_problems_text(slurm_rows))
+    parts.append("\nRaw Output\n")
+    i = 0
+    for notification_type in [problem_rows, recovery_rows, other_rows]:
+        parts.append("\nThere are " + str(len(notification_type)) + phrases[i] + "\n")
+        parts.append(_HEADER_TEXT)
+        for line in notification_type:
+            parts.append(", ".join(line) + "\n")
+        i += 1
+    return "".join(parts)
+
+def _fmt_node(number):
+    """Return the zero-padded node name, e.g. "n0012", for the given integer node number.
+
+    Keyword Arguments:
+    number -- the integer node number to format
+    """
+    return f"n{number:0{NODE_NUM_DIGITS}d}"
+
+def file_exists(file_path):
+    """Check whether or not the object at the given path is an existing file.
+
+    Keyword Arguments:
+    file_path -- the path to check
+    """
+    return os.path.exists(file_path) and os.path.isfile(file_path)
+
+def get_nodes_by_cluster(rows):
+    """Return a dictionary mapping from cluster name to a list of integer node numbers.
+
+    Keyword Arguments:
+    rows -- input data, where one of the columns pertains to a host name with number and cluster
+    """
+    cluster_nodes = defaultdict(list)
+    for row in rows:
+        host = row[_HOST_IDX]
+        # Compute hosts always start with "n0"; the cheap C-level prefix check skips the regex
+        # engine entirely for the vast majority of non-compute hosts.
+        if host.startswith("n0") and _COMPUTE_RE.match(host):
+            number, cluster = [field.strip() for field in host.split(".")]
+            integer = int(number[1:])
+            cluster_nodes[cluster].append(integer)
+    return cluster_nodes
+
+def get_node_list_string(node_list):
+    """Return a list of integer node numbers as a comma-separated string, with consecutive nodes 
+    condensed to a single entry with " - " separating the start and end of the range of nodes.
+
+    Keyword Arguments:
+    node_list -- a list of integer node numbers
+    """
+    node_list_entries = []
+    # Consecutive node numbers differ from their positions in the sorted list by a constant, so
+    # grouping on that difference yields each consecutive run, with the iteration done by
+    # itertools rather than a Python-level state machine.
+    node_list = sorted(set(node_list))
+    for (difference, group) in groupby(enumerate(node_list), lambda pair: pair[1] - pair[0]):
+        run = [node_number for (index, node_number) in group]
+        if run[0] == run[-1]:
+            node_list_entries.append(_fmt_node(run[0]))
+        else:
+            node_list_entries.append(_fmt_node(run[0]) + "-" + _fmt_node(run[-1]))
+    return ", ".join(node_list_entries)
+
+def get_rows_by_slurm_reason(rows):
+    """Return a dictionary containing some number of subsets of the given rows of the "SLURM" 
+    service, where each contains rows with additional information that ends with the same reason.
+
+    Keyword Arguments:
+    rows -- input data, where one of the columns pertains to the service and another to the info
+    """
+    # Rows are bucketed under the first-seen casing of each reason directly, with a side mapping
+    # from lowercased reason to that casing, rather than accumulating (reason, row) pairs and
+    # re-bucketing them in a second pass.
+    output_reasons = {}
+    key_by_lower = {}
+    for row in rows:
+        if row[_SERVICE_IDX] == "SLURM":
+            additional_info = row[_INFO_IDX]
+            # A single partition both detects a category prefix and yields the remainder, rather
+            # than a startswith over three concatenated prefixes followed by a second scan for ":".
+            (head, sep, rest) = additional_info.partition(":")
+            reason_raw = rest if sep and head in _CATEGORY_BY_PREFIX else additional_info
+            reason = " ".join(reason_raw.split())
+            key = key_by_lower.setdefault(reason.lower(), reason)
+            output_reasons.setdefault(key, []).append(row)
+    return output_reasons
+
+def parse_change_file(file_path, delimiter):
+    """Parse the file, assuming that it exists, at the given path line-by-line, where fields in
+    each line are delimited by the given delimiter, into a matrix where the columns correspond to
+    the fields in the global variable FIELDS, in order.
+
+    Keyword Arguments:
+    file_path -- the path at which the file is located
+    delimiter -- the character delimiting fields within each line
+    """
+    # The columns already appear in FIELDS order, so csv.reader tokenizes each line in C without
+    # the Python-level reordering loop over FIELDS.
+    with open(file_path, "r", newline="") as change_file:
+        reader = csv.reader(change_file, delimiter=delimiter)
+        return [[field_value.strip() for field_value in row] for row in reader]
+
+def prettify_html(html_string):
+    """Return a properly indented version of the given HTML string.
+
+    Keyword Arguments:
+    html_string -- the html to format
+    """
+    return etree.tostring(html.fromstring(html_string), encoding="unicode", pretty_print=True)
+
+def send_email_html(host, subject, sender, recipients, html, text):
+    """Send an e-mail with the given parameters, formatted with HTML and with an alternative 
+    plaintext version.
+
+    Keyword Arguments:
+    host -- the SMTP server to use
+    subject -- the subject line of the e-mail
+    sender -- the sending e-mail address
+    recipients -- the receiving e-mail addresses
+    html -- the content of the e-mail, in HTML format
+    text -- the content of the e-mail, in plaintext format
+    """
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = ", ".join(recipients)
+    msg.attach(MIMEText(text, "plain"))
+    msg.attach(MIMEText(html, "html"))
+    s = smtplib.SMTP(host)
+    s.sendmail(sender, recipients, msg.as_string())
+    s.quit()
+
+def send_email_text(host, subject, sender, recipients, text):
+    """Send a plaintext e-mail with the given parameters.
+
+    Keyword Arguments:
+    host -- the SMTP server to use
+    subject -- the subject line of the e-mail
+    sender -- the sending e-mail address
+    recipients -- the receiving e-mail addresses
+    text -- the text of the e-mail
+    """
+    msg = MIMEText(text)
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = ", ".join(recipients)
+    s = smtplib.SMTP(host)
+    s.sendmail(sender, recipients, msg.as_string())
+    s.quit()
+
+def main():
+    """Send an e-mail digest from the change file."""
+    # A single stat call answers existence, file type, and size at once; expanduser is needed
+    # because "~" in CHANGE_FILE is not resolved by the filesystem itself.
+    change_file_path = os.path.expanduser(CHANGE_FILE)
+    try:
+        change_file_stat = os.stat(change_file_path)
+    except FileNotFoundError:
+        print("Cannot read " + change_file_path + ".")
+        sys.exit(0)
+    if not stat.S_ISREG(change_file_stat.st_mode):
+        print("Cannot read " + change_file_path + ".")
+        sys.exit(0)
+    if change_file_stat.st_size == 0:
+        print("No changes in " + change_file_path + ".")
+        sys.exit(0)
+    parsed_file = parse_change_file(change_file_path, ",")
+    (notification_rows, slurm_rows) = bucket_rows(parsed_file)
+    problem_rows = notification_rows["PROBLEM"]
+    recovery_rows = notification_rows["RECOVERY"]
+    other_rows = notification_rows["OTHER"]
+    email_html = get_digest_html(slurm_rows, problem_rows, recovery_rows, other_rows)
+    email_text = get_digest_text(slurm_rows, problem_rows, recovery_rows, other_rows)
+    send_email_html("smtp.lbl.gov", "SLURM Digest", "meli@lbl.gov", ["meli@lbl.gov"], 
+                    email_html, email_text)
+    open(change_file_path, "w").close()
+
+if __name__ == "__main__":
+    main()
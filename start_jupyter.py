@@ -15,6 +15,7 @@ HELP_TEXT = "show jupyter output"
 HOSTNAME = "localhost"
 JUPYTER_CMD = "jupyter notebook --no-browser --ip=\"*\""
 MODULE_LOAD_CMD = "module load python/{}".format("3.6")
+POLL_INTERVAL = 0.1
 TIMEOUT = 5
 TMP_FILE_PATH = "jupyter.tmp"
 URL_PREFIX = "http://{}:".format(HOSTNAME)
@@ -23,19 +24,29 @@ def main():
     """Loads Python, launches Jupyter Notebook, and prints the URL for remote access."""
     parser = argparse.ArgumentParser()
     parser.add_argument("--verbosity", help=HELP_TEXT)
+    verbosity = parser.parse_args().verbosity
     with open(TMP_FILE_PATH, "w") as tmp_file:
         commands = "; ".join([MODULE_LOAD_CMD, JUPYTER_CMD])
         subprocess.Popen(commands, stdout=tmp_file, stderr=tmp_file, shell=True)
-    time.sleep(TIMEOUT)
-    with open(TMP_FILE_PATH) as tmp_file:
-        for line in tmp_file:
-            if parser.parse_args().verbosity:
+    hostname = socket.gethostname()
+    # Poll the log in short intervals rather than sleeping for the full timeout, so the URL is
+    # printed as soon as Jupyter writes it instead of a fixed TIMEOUT seconds later.
+    lines_printed = 0
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        with open(TMP_FILE_PATH) as tmp_file:
+            lines = tmp_file.readlines()
+        if verbosity:
+            for line in lines[lines_printed:]:
                 print(line)
+            lines_printed = len(lines)
+        for line in lines:
             line = line.strip()
             if line.find(URL_PREFIX) == 0:
-                url = line.replace(HOSTNAME, socket.gethostname(), 1)
+                url = line.replace(HOSTNAME, hostname, 1)
                 print("Your Jupyter Notebook instance is online at:\n{}".format(url))
                 return os.remove(TMP_FILE_PATH)
+        time.sleep(POLL_INTERVAL)
     print("There was an error starting Jupyter. See {} for details.".format(TMP_FILE_PATH))
 
 if __name__ == "__main__":